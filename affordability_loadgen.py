@@ -0,0 +1,100 @@
+"""
+Load generator for affordability_service.py.
+
+Starts the service in-process against the local fake LLM, fires concurrent
+/score and /explain requests with random applications, and reports p50/p99
+latency, throughput and the mean scoring batch size.
+
+    python affordability_loadgen.py --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import aiohttp
+from aiohttp import web
+
+from affordability_service import AffordabilityService, load_explainer
+
+
+def random_application():
+    return {
+        "annual_income": random.randint(40_000, 300_000),
+        "monthly_debt": random.randint(0, 3_000),
+        "home_price": random.randint(150_000, 1_200_000),
+        "rate": round(random.uniform(4.5, 8.0), 2),
+        "years": random.choice([15, 30]),
+    }
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(base_url, path, total_requests, concurrency):
+    """Send total_requests POSTs with at most `concurrency` in flight; return latencies and wall time."""
+    latencies = []
+    errors = 0
+    remaining = iter(range(total_requests))
+
+    async def worker(session):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            async with session.post(base_url + path, json=random_application()) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return sorted(latencies), elapsed, errors
+
+
+def report(name, latencies, elapsed, errors):
+    print(f"{name:<10}{len(latencies):>8}{errors:>8}{len(latencies) / elapsed:>12.1f}"
+          f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}")
+
+
+async def main(args):
+    service = AffordabilityService(
+        load_explainer(args.llm_latency),
+        batch_window=args.batch_window,
+        max_concurrent_explanations=args.max_concurrent_explanations,
+    )
+    runner = web.AppRunner(service.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        print(f"{'Endpoint':<10}{'Reqs':>8}{'Errors':>8}{'Req/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+        report("/score", *await run_load(base_url, "/score", args.requests, args.concurrency))
+        # Explanations are bounded by the LLM, so send fewer of them
+        report("/explain", *await run_load(base_url, "/explain", args.explain_requests, args.concurrency))
+        batcher = service.batcher
+        print(f"\nScoring batches: {batcher.batches}, mean batch size {batcher.scored / max(batcher.batches, 1):.1f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the affordability service against a fake LLM.")
+    parser.add_argument("--requests", type=int, default=2000, help="Number of /score requests")
+    parser.add_argument("--explain-requests", type=int, default=200, help="Number of /explain requests")
+    parser.add_argument("--concurrency", type=int, default=100, help="Requests in flight at once")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--batch-window", type=float, default=0.005)
+    parser.add_argument("--max-concurrent-explanations", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,263 @@
+"""
+Async HTTP service for mortgage affordability scoring and explanations.
+
+Endpoints:
+- POST /score    {"annual_income", "monthly_debt", "home_price", "rate", "years"?, "dti_limit"?}
+                 -> is_affordable, monthly_payment, max_monthly_budget
+- POST /explain  same body -> the scores plus the step-by-step LLM explanation
+                 from mortgage_cot_demo.py
+- GET  /health
+
+Scoring requests that arrive within a short window are micro-batched into one
+vectorized calculate_affordability() call over NumPy arrays. LLM explanations
+are dispatched with bounded concurrency so a burst of /explain requests can't
+flood the provider.
+
+    python affordability_service.py --port 8080
+    python affordability_service.py --fake-llm 0.5   # local fake LLM with 0.5s latency
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import time
+
+import numpy as np
+from aiohttp import web
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from basic_calculations import calculate_affordability
+from telemetry import telemetry_handler
+
+DEFAULT_YEARS = 30
+DEFAULT_DTI_LIMIT = 0.43
+
+REQUIRED_FIELDS = ("annual_income", "monthly_debt", "home_price", "rate")
+AMOUNT_FIELDS = ("annual_income", "monthly_debt", "home_price")
+
+# Accepted input ranges; they keep the amortization formula finite
+MAX_AMOUNT = 1e12
+MIN_RATE, MAX_RATE = 0.001, 100.0  # annual rate in percent; (1 + r) ** n - 1 underflows near 0
+MAX_YEARS = 50
+
+
+class FakeExplainer(BaseChatModel):
+    """Local stand-in for the explanation LLM: waits `latency` seconds and returns a fixed answer."""
+
+    latency: float = 0.5
+    text: str = "Step 1: monthly gross income... Step 4: the payment is compared with the budget."
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-explainer"
+
+    def _result(self):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+def load_explainer(fake_latency=None):
+    """Return the explanation chain: the mortgage CoT prompt piped into the real or a fake LLM."""
+    if fake_latency is not None:
+        # Dummy key so mortgage_cot_demo can build its (unused) ChatOpenAI client
+        os.environ.setdefault("OPENAI_API_KEY", "sk-dummy-key-for-fake-llm")
+    from mortgage_cot_demo import llm, prompt
+
+    if fake_latency is not None:
+        llm = FakeExplainer(latency=fake_latency)
+    return (prompt | llm).with_config(callbacks=[telemetry_handler])
+
+
+def parse_application(body):
+    """
+    Validate a request body and return the affordability inputs as floats.
+
+    Booleans, non-finite numbers, fractional years and values outside the
+    accepted ranges raise ValueError, which the service turns into a 400 response.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if field not in body]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    fields = (*REQUIRED_FIELDS, "years", "dti_limit")
+    defaults = {"years": DEFAULT_YEARS, "dti_limit": DEFAULT_DTI_LIMIT}
+    raw = {field: body.get(field, defaults.get(field)) for field in fields}
+    # float(True) is 1.0, so JSON booleans would otherwise pass as numbers
+    booleans = [field for field in fields if isinstance(raw[field], bool)]
+    if booleans:
+        raise ValueError(f"Expected numbers, got booleans: {', '.join(booleans)}")
+    try:
+        application = {field: float(raw[field]) for field in fields}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid number: {e}") from e
+
+    non_finite = [field for field, value in application.items() if not math.isfinite(value)]
+    if non_finite:
+        raise ValueError(f"Non-finite values: {', '.join(non_finite)}")
+    if not application["years"].is_integer():
+        raise ValueError("years must be a whole number")
+    application["years"] = int(application["years"])
+    out_of_range = [field for field in AMOUNT_FIELDS if not 0 <= application[field] <= MAX_AMOUNT]
+    if out_of_range:
+        raise ValueError(f"{', '.join(out_of_range)} must be between 0 and {MAX_AMOUNT:.0f}")
+    if not MIN_RATE <= application["rate"] <= MAX_RATE:
+        raise ValueError(f"rate must be between {MIN_RATE} and {MAX_RATE} (percent)")
+    if not 0 < application["years"] <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+    if not 0 < application["dti_limit"] <= 1:
+        raise ValueError("dti_limit must be between 0 and 1")
+    return application
+
+
+class AffordabilityBatcher:
+    """
+    Collects concurrent scoring requests and scores them with one vectorized call.
+
+    The first request of a batch starts a timer of `window` seconds; the batch
+    is scored when the timer fires or when it reaches max_batch_size.
+    """
+
+    def __init__(self, window=0.005, max_batch_size=256):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.scored = 0
+
+    async def score(self, application):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((application, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        columns = {
+            field: np.array([application[field] for application, _ in batch], dtype=float)
+            for field in (*REQUIRED_FIELDS, "years", "dti_limit")
+        }
+        try:
+            is_affordable, monthly_payment, max_monthly_budget = calculate_affordability(
+                annual_income=columns["annual_income"],
+                monthly_debt=columns["monthly_debt"],
+                home_price=columns["home_price"],
+                rate=columns["rate"],
+                year=columns["years"],
+                dti_limit=columns["dti_limit"],
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.scored += len(batch)
+        for i, (_, future) in enumerate(batch):
+            # The client may have disconnected and cancelled its future
+            if not future.done():
+                future.set_result({
+                    "is_affordable": bool(is_affordable[i]),
+                    "monthly_payment": round(float(monthly_payment[i]), 2),
+                    "max_monthly_budget": round(float(max_monthly_budget[i]), 2),
+                })
+
+
+class AffordabilityService:
+    """Holds the batcher and explanation chain and serves the HTTP endpoints."""
+
+    def __init__(self, explainer, batch_window=0.005, max_batch_size=256, max_concurrent_explanations=8):
+        self.explainer = explainer
+        self.batcher = AffordabilityBatcher(window=batch_window, max_batch_size=max_batch_size)
+        self.explain_slots = asyncio.Semaphore(max_concurrent_explanations)
+
+    async def _read_application(self, request):
+        try:
+            return parse_application(await request.json())
+        except ValueError as e:
+            # Also covers malformed JSON (json.JSONDecodeError is a ValueError)
+            raise web.HTTPBadRequest(text=str(e))
+
+    async def handle_score(self, request):
+        application = await self._read_application(request)
+        return web.json_response(await self.batcher.score(application))
+
+    async def handle_explain(self, request):
+        application = await self._read_application(request)
+        scores = await self.batcher.score(application)
+        async with self.explain_slots:
+            response = await self.explainer.ainvoke({
+                "annual_income": application["annual_income"],
+                "monthly_debt": application["monthly_debt"],
+                "home_price": application["home_price"],
+                "rate": application["rate"],
+                "years": application["years"],
+                "dti_limit": application["dti_limit"],
+                "monthly_payment": scores["monthly_payment"],
+                "max_monthly_budget": scores["max_monthly_budget"],
+                "is_affordable": scores["is_affordable"],
+            })
+        return web.json_response({**scores, "explanation": response.content})
+
+    async def handle_health(self, request):
+        batcher = self.batcher
+        return web.json_response({
+            "status": "ok",
+            "batches": batcher.batches,
+            "scored": batcher.scored,
+            "mean_batch_size": batcher.scored / batcher.batches if batcher.batches else 0,
+        })
+
+    def make_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.post("/score", self.handle_score),
+            web.post("/explain", self.handle_explain),
+            web.get("/health", self.handle_health),
+        ])
+        return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mortgage affordability HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-window", type=float, default=0.005, help="Seconds to collect a scoring batch")
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-concurrent-explanations", type=int, default=8)
+    parser.add_argument("--fake-llm", type=float, metavar="LATENCY", default=None,
+                        help="Use a local fake LLM with this latency in seconds")
+    args = parser.parse_args()
+
+    async def make_app():
+        service = AffordabilityService(
+            load_explainer(args.fake_llm),
+            batch_window=args.batch_window,
+            max_batch_size=args.max_batch_size,
+            max_concurrent_explanations=args.max_concurrent_explanations,
+        )
+        return service.make_app()
+
+    web.run_app(make_app(), host=args.host, port=args.port)
@@ -0,0 +1,106 @@
+"""
+Per-query budgets for the research agent loops.
+
+A budget caps the wall time, total LLM tokens and tool rounds of one query.
+Usage is derived from the message history: tokens from each AIMessage's
+usage_metadata, and one tool round per AIMessage whose tool calls were
+answered by ToolMessages (calls skipped by a forced final answer don't
+count, but the tokens spent requesting them do). When the
+next step would overrun a budget, the agent is routed to one final,
+tool-free answer step that uses what it has gathered so far.
+
+    inputs = {"messages": [("user", query)], "budget": new_budget(max_seconds=30)}
+"""
+
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from telemetry import telemetry_handler
+
+DEFAULT_BUDGET = {
+    "max_seconds": 90.0,
+    "max_tokens": 30_000,
+    "max_tool_rounds": 4,
+}
+
+# Head room kept for the final answer step
+FINAL_ANSWER_RESERVE_SECONDS = 10.0
+FINAL_ANSWER_RESERVE_TOKENS = 1_000
+
+FINAL_ANSWER_INSTRUCTION = (
+    "You have reached the research budget for this question. Do not call any more tools. "
+    "Answer now using only the information gathered above, and say briefly if anything "
+    "could not be verified."
+)
+
+
+def new_budget(**limits):
+    """A budget for one query; pass max_seconds, max_tokens or max_tool_rounds to override the defaults."""
+    unknown = set(limits) - set(DEFAULT_BUDGET)
+    if unknown:
+        raise ValueError(f"Unknown budget limits: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_BUDGET, **limits, "started_at": time.time()}
+
+
+def budget_usage(state):
+    """Elapsed seconds, total tokens and tool rounds used so far in a run."""
+    budget = state.get("budget") or {}
+    ai_messages = [m for m in state["messages"] if isinstance(m, AIMessage)]
+    answered = {m.tool_call_id for m in state["messages"] if isinstance(m, ToolMessage)}
+    started_at = budget.get("started_at")
+    return {
+        "seconds": time.time() - started_at if started_at else 0.0,
+        "tokens": sum((m.usage_metadata or {}).get("total_tokens", 0) for m in ai_messages),
+        "tool_rounds": sum(1 for m in ai_messages if any(call["id"] in answered for call in m.tool_calls)),
+        # The next model call sees at least as much context as the last one
+        "last_input_tokens": (ai_messages[-1].usage_metadata or {}).get("input_tokens", 0) if ai_messages else 0,
+    }
+
+
+def budget_exhausted(state):
+    """
+    Name of the budget the next step would overrun ("time", "tokens" or
+    "tool_rounds"), or None if the agent may continue.
+
+    Works both before running a requested tool round and before the next
+    model call, since only tool rounds that already ran are counted.
+    """
+    budget = {**DEFAULT_BUDGET, **(state.get("budget") or {})}
+    usage = budget_usage(state)
+
+    if usage["seconds"] + FINAL_ANSWER_RESERVE_SECONDS >= budget["max_seconds"]:
+        return "time"
+    if usage["tokens"] + usage["last_input_tokens"] + FINAL_ANSWER_RESERVE_TOKENS >= budget["max_tokens"]:
+        return "tokens"
+    # No room for another round, whether it is already requested or the next model call would ask for one
+    if usage["tool_rounds"] >= budget["max_tool_rounds"]:
+        return "tool_rounds"
+    return None
+
+
+def final_answer_messages(messages):
+    """Messages for the forced final step: drop unanswered tool calls and ask for an answer."""
+    messages = list(messages)
+    if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+        # OpenAI rejects tool calls that aren't followed by their results
+        messages = messages[:-1]
+    return messages + [HumanMessage(content=FINAL_ANSWER_INSTRUCTION)]
+
+
+def record_budget_usage(agent_name, state):
+    """Log a run's budget usage as a telemetry event and return it."""
+    budget = {**DEFAULT_BUDGET, **(state.get("budget") or {})}
+    usage = budget_usage(state)
+    event = {
+        "ts": time.time(),
+        "type": "budget",
+        "name": agent_name,
+        "wall_time": usage["seconds"],
+        "tokens": usage["tokens"],
+        "tool_rounds": usage["tool_rounds"],
+        "limits": {key: budget[key] for key in DEFAULT_BUDGET},
+        "stopped_by": state.get("stopped_by"),
+    }
+    telemetry_handler.record(event)
+    return event
@@ -1,6 +1,7 @@
 def calculate_affordability(annual_income, monthly_debt, home_price, rate, year= 30, dti_limit=0.43):
     """
     Calculate if a user can afford a home based on their financial details.
+    The arguments may also be NumPy arrays to score many applications in one call.
 
     Parameters:
     - annual_income (float): The user's annual income.
@@ -3,6 +3,9 @@ from langchain_core.prompts import PromptTemplate
 from langchain_aws import ChatBedrock
 
 from basic_calculations import calculate_affordability
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
 
 load_dotenv()
 
@@ -10,12 +13,12 @@ load_dotenv()
 # AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION_NAME
 
 # Switching to Amazon Titan which has easier access requirements than Claude 3
-llm = ChatBedrock(
+llm = throttle(ChatBedrock(
     model_id="amazon.nova-micro-v1:0",
     model_kwargs={"temperature": 0.1},
-    # You can optionally pass a boto3 client if you need custom config
-    # client=boto3_client 
-)
+    # Shared boto3 client with a keep-alive connection pool (see client_registry.py)
+    **shared_client_kwargs("bedrock"),
+))
 
 prompt = PromptTemplate.from_template(
     """You are a mortgage affordability assistant. 
@@ -78,12 +81,13 @@ def run_demo():
     )
 
     print("\n--- Sending request to LLM (Bedrock) ---\n")
-    response = llm.invoke(formatted_prompt)
+    response = llm.invoke(formatted_prompt, config={"callbacks": [telemetry_handler]})
     
     print("\n[DEBUG] Full Response Object:", response)
     print("\n[DEBUG] Response Metadata:", response.response_metadata)
     
     print("\n" + response.content)
+    telemetry_handler.print_summary()
 
 
 if __name__ == "__main__":
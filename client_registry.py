@@ -0,0 +1,218 @@
+"""
+Shared keep-alive HTTP clients for the OpenAI, Bedrock and Tavily calls.
+
+Every script builds its own ChatOpenAI / ChatBedrock / TavilySearchResults,
+but they can all share one pooled client per provider, so connections (DNS,
+TCP and TLS setup) are reused across chains, agents and tools:
+
+    llm = ChatOpenAI(model="gpt-4o-mini", **shared_client_kwargs("openai"))
+    search = TavilySearchResults(max_results=3, **shared_client_kwargs("tavily"))
+
+prewarm() opens the OpenAI and Tavily connections in a background thread,
+e.g. while a REPL waits for the first question, and print_latency_report()
+compares the first request on each pool with the steady-state latency.
+
+The async clients belong to the first event loop that uses them, so use one
+asyncio.run() per process (as the scripts in this repo do).
+"""
+
+import os
+import statistics
+import threading
+import time
+from functools import lru_cache
+
+import httpx
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+TAVILY_API_URL = "https://api.tavily.com"
+
+# Per-provider connection pool limits
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 120  # seconds an idle connection is kept open
+
+# Endpoints hit by prewarm(); any response (even 401/404) means the connection is open
+_PREWARM_URLS = {
+    "openai": f"{OPENAI_BASE_URL}/models",
+    "tavily": TAVILY_API_URL,
+}
+
+_lock = threading.Lock()
+_clients = {}
+# provider -> list of (seconds, was_prewarm) for every request sent on its pool
+_latencies = {}
+
+
+def _record(provider, request, prewarm=False):
+    start = request.extensions.get("registry_start")
+    if start is not None:
+        with _lock:
+            _latencies.setdefault(provider, []).append((time.perf_counter() - start, prewarm))
+
+
+def _hooks(provider, is_async):
+    def on_request(request):
+        request.extensions["registry_start"] = time.perf_counter()
+
+    def on_response(response):
+        _record(provider, response.request, response.request.extensions.get("registry_prewarm", False))
+
+    if not is_async:
+        return {"request": [on_request], "response": [on_response]}
+
+    async def on_request_async(request):
+        on_request(request)
+
+    async def on_response_async(response):
+        on_response(response)
+
+    return {"request": [on_request_async], "response": [on_response_async]}
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def http_client(provider):
+    """The shared sync httpx client for a provider."""
+    with _lock:
+        key = (provider, "sync")
+        if key not in _clients:
+            _clients[key] = httpx.Client(limits=_limits(), timeout=httpx.Timeout(60.0, connect=10.0),
+                                         event_hooks=_hooks(provider, is_async=False))
+        return _clients[key]
+
+
+def async_http_client(provider):
+    """The shared async httpx client for a provider."""
+    with _lock:
+        key = (provider, "async")
+        if key not in _clients:
+            _clients[key] = httpx.AsyncClient(limits=_limits(), timeout=httpx.Timeout(60.0, connect=10.0),
+                                              event_hooks=_hooks(provider, is_async=True))
+        return _clients[key]
+
+
+def bedrock_client():
+    """The shared boto3 bedrock-runtime client, with a larger keep-alive pool."""
+    with _lock:
+        if "bedrock" not in _clients:
+            import boto3
+            from botocore.config import Config
+
+            _clients["bedrock"] = boto3.client(
+                "bedrock-runtime",
+                region_name=os.getenv("AWS_REGION_NAME") or os.getenv("AWS_REGION"),
+                config=Config(max_pool_connections=MAX_CONNECTIONS, tcp_keepalive=True),
+            )
+        return _clients["bedrock"]
+
+
+@lru_cache
+def _pooled_tavily_wrapper_class():
+    # Imported lazily so scripts that don't use Tavily don't pay for langchain_community
+    from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+
+    class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+        """TavilySearchAPIWrapper that sends requests on the shared keep-alive clients."""
+
+        def _params(self, query, max_results, search_depth, include_domains, exclude_domains,
+                    include_answer, include_raw_content, include_images):
+            return {
+                "api_key": self.tavily_api_key.get_secret_value(),
+                "query": query,
+                "max_results": max_results,
+                "search_depth": search_depth,
+                "include_domains": include_domains,
+                "exclude_domains": exclude_domains,
+                "include_answer": include_answer,
+                "include_raw_content": include_raw_content,
+                "include_images": include_images,
+            }
+
+        def raw_results(self, query, max_results=5, search_depth="advanced", include_domains=[],
+                        exclude_domains=[], include_answer=False, include_raw_content=False, include_images=False):
+            params = self._params(query, max_results, search_depth, include_domains, exclude_domains,
+                                  include_answer, include_raw_content, include_images)
+            response = http_client("tavily").post(f"{TAVILY_API_URL}/search", json=params)
+            response.raise_for_status()
+            return response.json()
+
+        async def raw_results_async(self, query, max_results=5, search_depth="advanced", include_domains=[],
+                                    exclude_domains=[], include_answer=False, include_raw_content=False,
+                                    include_images=False):
+            params = self._params(query, max_results, search_depth, include_domains, exclude_domains,
+                                  include_answer, include_raw_content, include_images)
+            response = await async_http_client("tavily").post(f"{TAVILY_API_URL}/search", json=params)
+            response.raise_for_status()
+            return response.json()
+
+    return PooledTavilySearchAPIWrapper
+
+
+def shared_client_kwargs(provider):
+    """Constructor keyword arguments that make a ChatOpenAI, ChatBedrock or TavilySearchResults use the shared pool."""
+    if provider == "openai":
+        # ChatOpenAI only turns stream_usage on by default when it builds its own clients
+        return {"http_client": http_client("openai"), "http_async_client": async_http_client("openai"),
+                "stream_usage": True}
+    if provider == "bedrock":
+        return {"client": bedrock_client()}
+    if provider == "tavily":
+        return {"api_wrapper": _pooled_tavily_wrapper_class()()}
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def prewarm(providers=("openai", "tavily"), background=True):
+    """
+    Open a keep-alive connection to each provider so the first real call skips DNS/TLS setup.
+
+    With background=True this returns immediately and warms up in a daemon thread.
+    """
+    def _warm():
+        for provider in providers:
+            try:
+                http_client(provider).get(_PREWARM_URLS[provider], extensions={"registry_prewarm": True})
+            except httpx.HTTPError as e:
+                print(f"[prewarm] {provider}: {e}")
+
+    if not background:
+        _warm()
+        return None
+    thread = threading.Thread(target=_warm, name="client-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def latency_report():
+    """
+    Per provider: prewarm latency, first real request latency and the median of the rest.
+
+    Latencies are measured up to the response headers.
+    """
+    report = {}
+    with _lock:
+        for provider, samples in _latencies.items():
+            warm = [seconds for seconds, prewarm in samples if prewarm]
+            real = [seconds for seconds, prewarm in samples if not prewarm]
+            report[provider] = {
+                "prewarm": warm[0] if warm else None,
+                "first_call": real[0] if real else None,
+                "steady_state": statistics.median(real[1:]) if len(real) > 1 else None,
+                "requests": len(real),
+            }
+    return report
+
+
+def print_latency_report():
+    def fmt(seconds):
+        return f"{seconds * 1000:.0f} ms" if seconds is not None else "-"
+
+    for provider, row in latency_report().items():
+        print(f"[{provider}] prewarm {fmt(row['prewarm'])}, first call {fmt(row['first_call'])}, "
+              f"steady state {fmt(row['steady_state'])} over {row['requests']} requests")
@@ -2,9 +2,13 @@ from dotenv import load_dotenv
 from langchain_core.prompts import FewShotPromptTemplate, PromptTemplate
 from langchain_openai import ChatOpenAI
 
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
+
 load_dotenv()
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_client_kwargs("openai")))
 
 
 examples = [
@@ -29,9 +33,10 @@ fewshot_prompt = FewShotPromptTemplate(
 )
 print("##### PROMPT TEMPLATE FORMATTED:\n", fewshot_prompt.format(question="If I have 30 apples, use 20 for lunch, and buy 6 more, how many apples do I have?"), "\n")
 
-chain = fewshot_prompt | llm
+chain = (fewshot_prompt | llm).with_config(callbacks=[telemetry_handler])
 print("##### CHAIN FORMATTED:\n", chain, "\n")
 
 # Example usage
 question = "If I have 30 apples, use 20 for lunch, and buy 6 more, how many apples do I have?"
-print(chain.invoke({"question": question}).content)
\ No newline at end of file
+print(chain.invoke({"question": question}).content)
+telemetry_handler.print_summary()
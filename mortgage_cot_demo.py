@@ -3,10 +3,13 @@ from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 
 from basic_calculations import calculate_affordability
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
 
 load_dotenv()
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_client_kwargs("openai")))
 
 prompt = PromptTemplate.from_template(
     """You are a mortgage affordability assistant. 
@@ -69,8 +72,9 @@ def run_demo():
     )
 
     print("\n--- Sending request to LLM ---\n", formatted_prompt, "\n")
-    response = llm.invoke(formatted_prompt)
+    response = llm.invoke(formatted_prompt, config={"callbacks": [telemetry_handler]})
     print(response.content)
+    telemetry_handler.print_summary()
 
 
 if __name__ == "__main__":
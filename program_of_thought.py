@@ -0,0 +1,249 @@
+"""
+Program-of-thought fast path for arithmetic word problems.
+
+Instead of letting the model write out a long "Let's think step by step"
+answer, the model returns a single arithmetic expression plus a one-line
+explanation. The expression is checked and evaluated locally, so the output
+is a handful of tokens. Verbose CoT is kept as a fallback when the model's
+expression can't be evaluated safely.
+"""
+
+import ast
+import math
+import operator
+import re
+import time
+
+from dotenv import load_dotenv
+from langchain_core.prompts import PromptTemplate
+from langchain_openai import ChatOpenAI
+
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
+
+load_dotenv()
+
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_client_kwargs("openai")))
+
+# Verbose chain-of-thought, same prompt as cot-simpledemo.py
+cot_prompt = PromptTemplate.from_template(
+    """Question: {question}
+Answer: Let's think step by step."""
+)
+
+pot_prompt = PromptTemplate.from_template(
+    """Translate the question into ONE arithmetic expression that computes the answer.
+Use only numbers, + - * / // % ** and parentheses. Do not compute the result yourself.
+Reply with exactly two lines and nothing else:
+Expression: <arithmetic expression>
+Explanation: <one short sentence>
+
+Question: If I have 10 tennis balls and I lost 3, how many balls do I have left?
+Expression: 10 - 3
+Explanation: Start with 10 balls and subtract the 3 that were lost.
+
+Question: {question}
+"""
+)
+
+cot_chain = (cot_prompt | llm).with_config(callbacks=[telemetry_handler])
+# The expression and explanation fit in a few dozen tokens, so cap the output
+pot_chain = (pot_prompt | llm.bind(max_tokens=80)).with_config(callbacks=[telemetry_handler])
+
+
+# Operators allowed in a program-of-thought expression
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+MAX_EXPRESSION_LENGTH = 200
+MAX_EXPONENT = 100
+# Every intermediate result must stay below 10**MAX_DIGITS
+MAX_DIGITS = 30
+MAX_MAGNITUDE = 10 ** MAX_DIGITS
+
+
+def _checked(value):
+    """Reject complex, non-finite and oversized values before they are used any further."""
+    if isinstance(value, complex):
+        raise ValueError("Result is not a real number")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError("Result is not finite")
+    if abs(value) > MAX_MAGNITUDE:
+        raise ValueError("Result is too large")
+    return value
+
+
+def safe_eval(expression: str):
+    """
+    Evaluate a plain arithmetic expression without calling eval().
+
+    Only numeric literals, + - * / // % **, unary +/- and parentheses are
+    accepted. Anything else (names, calls, attributes), and any step whose
+    result would be complex, infinite or larger than 10**MAX_DIGITS, raises
+    ValueError. Powers are size-checked before they are computed.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Expression is too long")
+
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Not a valid expression: {expression!r}") from e
+
+    def _eval(node):
+        if isinstance(node, ast.Expression):
+            return _eval(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return _checked(node.value)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            left, right = _eval(node.left), _eval(node.right)
+            if isinstance(node.op, ast.Pow):
+                if abs(right) > MAX_EXPONENT:
+                    raise ValueError("Exponent is too large")
+                # Number of digits of the result, estimated without computing it
+                if left != 0 and right * math.log10(abs(left)) > MAX_DIGITS:
+                    raise ValueError("Result is too large")
+            return _checked(_BIN_OPS[type(node.op)](left, right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return _checked(_UNARY_OPS[type(node.op)](_eval(node.operand)))
+        raise ValueError(f"Unsupported element in expression: {ast.dump(node)}")
+
+    try:
+        result = _eval(tree)
+    except (ZeroDivisionError, OverflowError) as e:
+        raise ValueError(f"Could not evaluate {expression!r}: {e}") from e
+
+    # Show whole numbers without a trailing .0
+    if isinstance(result, float) and result.is_integer():
+        result = int(result)
+    return result
+
+
+def parse_pot_response(text: str):
+    """Pull the expression and explanation lines out of a program-of-thought reply."""
+    expression = re.search(r"Expression:\s*(.+)", text)
+    explanation = re.search(r"Explanation:\s*(.+)", text)
+    if not expression:
+        raise ValueError(f"No expression found in response: {text!r}")
+    # Drop stray code fences/backticks the model sometimes adds
+    return (
+        expression.group(1).strip().strip("`"),
+        explanation.group(1).strip() if explanation else "",
+    )
+
+
+def _token_usage(response):
+    """Return (input_tokens, output_tokens) reported by the provider, if any."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+def solve_with_cot(question: str):
+    """Answer a question with verbose chain-of-thought."""
+    start = time.perf_counter()
+    response = cot_chain.invoke({"question": question})
+    input_tokens, output_tokens = _token_usage(response)
+    return {
+        "mode": "cot",
+        "answer": response.content,
+        "expression": None,
+        "explanation": None,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "latency": time.perf_counter() - start,
+    }
+
+
+def solve_with_pot(question: str, fallback: bool = True):
+    """
+    Answer an arithmetic question with the program-of-thought fast path.
+
+    The model returns an expression that is evaluated locally with safe_eval().
+    If the expression is missing or rejected and fallback is True, the question
+    is answered with verbose chain-of-thought instead (tokens and latency of
+    both attempts are counted).
+    """
+    start = time.perf_counter()
+    response = pot_chain.invoke({"question": question})
+    input_tokens, output_tokens = _token_usage(response)
+
+    try:
+        expression, explanation = parse_pot_response(response.content)
+        answer = safe_eval(expression)
+    except ValueError as e:
+        if not fallback:
+            raise
+        print(f"[PoT] Falling back to chain-of-thought: {e}")
+        result = solve_with_cot(question)
+        result["mode"] = "pot->cot"
+        result["input_tokens"] += input_tokens
+        result["output_tokens"] += output_tokens
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    return {
+        "mode": "pot",
+        "answer": answer,
+        "expression": expression,
+        "explanation": explanation,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "latency": time.perf_counter() - start,
+    }
+
+
+def compare_modes(questions):
+    """Run every question through both modes and print tokens and latency side by side."""
+    results = []
+    for question in questions:
+        cot = solve_with_cot(question)
+        pot = solve_with_pot(question)
+        results.append((question, cot, pot))
+
+    print(f"\n{'='*78}")
+    print(f"{'Mode':<10}{'In tok':>10}{'Out tok':>10}{'Latency (s)':>14}  Answer")
+    print(f"{'='*78}")
+    for question, cot, pot in results:
+        print(f"Q: {question}")
+        for result in (cot, pot):
+            # Last line of a CoT reply; empty replies have no lines at all
+            lines = str(result["answer"]).strip().splitlines()
+            answer = lines[-1] if lines else ""
+            print(
+                f"{result['mode']:<10}{result['input_tokens']:>10}{result['output_tokens']:>10}"
+                f"{result['latency']:>14.2f}  {answer[:40]}"
+            )
+        print("-" * 78)
+
+    for mode_index, name in ((1, "cot"), (2, "pot")):
+        output_tokens = sum(r[mode_index]["output_tokens"] for r in results)
+        latency = sum(r[mode_index]["latency"] for r in results)
+        print(f"Total {name}: {output_tokens} output tokens, {latency:.2f}s")
+
+    return results
+
+
+if __name__ == "__main__":
+    question = "If I have 30 apples, use 20 for lunch, and buy 6 more, how many apples do I have?"
+
+    result = solve_with_pot(question)
+    print(f"Expression: {result['expression']}")
+    print(f"Answer: {result['answer']}")
+    print(f"Explanation: {result['explanation']}")
+
+    compare_modes([
+        question,
+        "If I have 10 tennis balls and I lost 3, how many balls do I have left?",
+        "A baker makes 12 trays of 24 cookies and sells 150. How many cookies are left?",
+    ])
@@ -0,0 +1,309 @@
+"""
+Process-wide rate-limit scheduler shared by the OpenAI, Bedrock and Tavily calls.
+
+Every provider gets a token bucket for requests per minute and, for LLMs, a
+second bucket for tokens per minute. Callers queue per provider in priority
+order, so interactive REPL queries are served before batch jobs when quota is
+tight, instead of everybody firing at once and failing with 429s.
+
+Wrap an existing model or tool with throttle():
+
+    llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0))
+    search = throttle(TavilySearchResults(max_results=3))
+
+and run batch work inside `with priority(BATCH):`.
+
+Limits can be overridden with RATE_LIMIT_<PROVIDER>_RPM / _TPM environment
+variables, e.g. RATE_LIMIT_OPENAI_TPM=200000.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.tools import BaseTool, StructuredTool
+
+# Priority lanes: lower values are served first
+INTERACTIVE = 0
+BATCH = 10
+
+# Default (requests per minute, tokens per minute); None means no token limit
+DEFAULT_LIMITS = {
+    "openai": (500, 200_000),
+    "bedrock": (100, 100_000),
+    "tavily": (100, None),
+}
+
+# Output tokens assumed for a call that doesn't set max_tokens
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 256
+
+# Polling interval for async waiters and waiters that aren't at the head of the queue
+_POLL_INTERVAL = 0.05
+
+_priority = contextvars.ContextVar("rate_limit_priority", default=INTERACTIVE)
+# Token estimate for the chat model call that is about to acquire, set by _TokenEstimator
+_pending_tokens = contextvars.ContextVar("rate_limit_pending_tokens", default=0)
+
+
+@contextmanager
+def priority(level):
+    """Run the calls made inside the block in the given priority lane."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Bucket refilled continuously at per_minute / 60 units per second, holding at most one minute's worth."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount units are available (0 if they are available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        # May go negative when a call used more than estimated; later callers wait it off
+        self.level -= amount
+
+
+class _ProviderQueue:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.waiters = []
+
+
+class RateLimitScheduler:
+    """Token-bucket scheduler with per-provider priority queues, safe to share across threads and event loops."""
+
+    def __init__(self, limits=None):
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queues = {}
+        for provider, (rpm, tpm) in {**DEFAULT_LIMITS, **(limits or {})}.items():
+            self.configure(provider, rpm, tpm)
+
+    def configure(self, provider, rpm, tpm=None):
+        """Set (or replace) the limits for a provider."""
+        prefix = f"RATE_LIMIT_{provider.upper()}"
+        rpm = int(os.getenv(f"{prefix}_RPM", rpm))
+        tpm = os.getenv(f"{prefix}_TPM", tpm)
+        with self._cond:
+            self._queues[provider] = _ProviderQueue(rpm, int(tpm) if tpm else None)
+
+    def _try_take(self, queue, ticket, tokens):
+        """Take quota for ticket if it is at the head of the queue; return seconds to wait otherwise."""
+        if queue.waiters[0] != ticket:
+            return _POLL_INTERVAL
+        delay = queue.requests.wait_time(1)
+        if queue.tokens is not None:
+            delay = max(delay, queue.tokens.wait_time(tokens))
+        if delay == 0:
+            queue.requests.take(1)
+            if queue.tokens is not None:
+                queue.tokens.take(tokens)
+        return delay
+
+    def _leave(self, queue, ticket):
+        if ticket in queue.waiters:
+            queue.waiters.remove(ticket)
+            heapq.heapify(queue.waiters)
+        self._cond.notify_all()
+
+    def acquire(self, provider, tokens=0, blocking=True, level=None):
+        """
+        Wait for one request and `tokens` estimated tokens of quota.
+
+        Returns True once acquired, or False if blocking is False and the
+        quota isn't available right away.
+        """
+        queue = self._queues[provider]
+        ticket = (_priority.get() if level is None else level, next(self._seq))
+        with self._cond:
+            heapq.heappush(queue.waiters, ticket)
+            try:
+                while True:
+                    delay = self._try_take(queue, ticket, tokens)
+                    if delay == 0:
+                        return True
+                    if not blocking:
+                        return False
+                    self._cond.wait(timeout=delay)
+            finally:
+                self._leave(queue, ticket)
+
+    async def aacquire(self, provider, tokens=0, blocking=True, level=None):
+        """Async version of acquire(); never blocks the event loop."""
+        queue = self._queues[provider]
+        ticket = (_priority.get() if level is None else level, next(self._seq))
+        with self._cond:
+            heapq.heappush(queue.waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_take(queue, ticket, tokens)
+                if delay == 0:
+                    return True
+                if not blocking:
+                    return False
+                await asyncio.sleep(min(delay, _POLL_INTERVAL))
+        finally:
+            with self._cond:
+                self._leave(queue, ticket)
+
+    def adjust(self, provider, tokens):
+        """Charge (or refund, if negative) tokens after a call reports its real usage."""
+        queue = self._queues[provider]
+        if queue.tokens is None:
+            return
+        with self._cond:
+            queue.tokens.take(tokens)
+            self._cond.notify_all()
+
+
+# Shared by every script running in this process
+scheduler = RateLimitScheduler()
+
+
+class SchedulerRateLimiter(BaseRateLimiter):
+    """Adapter that plugs the shared scheduler into a chat model's rate_limiter field."""
+
+    def __init__(self, provider, scheduler=scheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def acquire(self, *, blocking=True):
+        tokens = _pending_tokens.get()
+        _pending_tokens.set(0)
+        return self.scheduler.acquire(self.provider, tokens, blocking=blocking)
+
+    async def aacquire(self, *, blocking=True):
+        tokens = _pending_tokens.get()
+        _pending_tokens.set(0)
+        return await self.scheduler.aacquire(self.provider, tokens, blocking=blocking)
+
+
+class _TokenEstimator(BaseCallbackHandler):
+    """
+    Estimates the tokens of a chat model call before its rate limiter runs.
+
+    LangChain fires on_chat_model_start right before rate_limiter.acquire(), in
+    the same context, so the estimate is handed over through a context variable.
+    When the call ends, the difference to the real usage is charged or refunded.
+    """
+
+    # Must run in the caller's context so the context variable is visible to acquire()
+    run_inline = True
+
+    def __init__(self, provider, scheduler=scheduler, expected_output_tokens=DEFAULT_EXPECTED_OUTPUT_TOKENS):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.expected_output_tokens = expected_output_tokens
+        self._estimates = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        # Roughly 4 characters per token for English text
+        input_tokens = sum(len(str(m.content)) for batch in messages for m in batch) // 4
+        max_tokens = (kwargs.get("invocation_params") or {}).get("max_tokens")
+        estimate = input_tokens + (max_tokens or self.expected_output_tokens)
+        self._estimates[run_id] = estimate
+        _pending_tokens.set(estimate)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        estimate = self._estimates.pop(run_id, None)
+        if estimate is None:
+            return
+        try:
+            usage = response.generations[0][0].message.usage_metadata
+        except (IndexError, AttributeError):
+            usage = None
+        if usage:
+            self.scheduler.adjust(self.provider, usage["total_tokens"] - estimate)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._estimates.pop(run_id, None)
+
+
+def _provider_for(obj):
+    name = type(obj).__name__.lower()
+    for provider in ("openai", "bedrock", "tavily"):
+        if provider in name:
+            return provider
+    raise ValueError(f"Can't tell the provider of {type(obj).__name__}; pass provider=...")
+
+
+def throttle(obj, provider=None, scheduler=scheduler):
+    """
+    Route a chat model or tool through the shared scheduler.
+
+    Chat models are changed in place (their rate_limiter and an estimator
+    callback are set) and returned, so bind_tools() and create_react_agent()
+    keep working. Tools are wrapped in a StructuredTool with the same name,
+    description and arguments that acquires quota before each call.
+    """
+    provider = provider or _provider_for(obj)
+
+    if isinstance(obj, BaseChatModel):
+        obj.rate_limiter = SchedulerRateLimiter(provider, scheduler)
+        obj.callbacks = [*(obj.callbacks or []), _TokenEstimator(provider, scheduler)]
+        return obj
+
+    if isinstance(obj, BaseTool):
+        tool = obj
+        # Run the wrapped tool without callbacks; the wrapper's own run is what gets traced
+        untraced = {"callbacks": []}
+        with_artifact = tool.response_format == "content_and_artifact"
+
+        def _as_tool_call(kwargs):
+            # Invoked with a plain dict a tool returns only its content; as a tool
+            # call it returns a ToolMessage that also carries the artifact
+            return {"type": "tool_call", "name": tool.name, "args": kwargs, "id": f"throttled-{uuid.uuid4()}"}
+
+        def _run(**kwargs):
+            scheduler.acquire(provider)
+            if with_artifact:
+                message = tool.invoke(_as_tool_call(kwargs), config=untraced)
+                return message.content, message.artifact
+            return tool.invoke(kwargs, config=untraced)
+
+        async def _arun(**kwargs):
+            await scheduler.aacquire(provider)
+            if with_artifact:
+                message = await tool.ainvoke(_as_tool_call(kwargs), config=untraced)
+                return message.content, message.artifact
+            return await tool.ainvoke(kwargs, config=untraced)
+
+        return StructuredTool.from_function(
+            func=_run,
+            coroutine=_arun,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            return_direct=tool.return_direct,
+            response_format=tool.response_format,
+        )
+
+    raise TypeError(f"throttle() expects a chat model or a tool, got {type(obj).__name__}")
@@ -0,0 +1,184 @@
+"""
+Parallel self-consistency sampling for the CoT chains.
+
+N chain-of-thought samples are sent concurrently. Each sample is streamed and
+its final numeric answer is extracted as soon as it appears. Once a
+configurable number of samples agree, the remaining ones are cancelled, so
+the answer costs roughly one call of latency instead of N.
+"""
+
+import asyncio
+import re
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+from langchain_core.prompts import PromptTemplate
+from langchain_openai import ChatOpenAI
+
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
+
+load_dotenv()
+
+# Samples need some randomness, otherwise every sample is the same answer
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0.7, **shared_client_kwargs("openai")))
+
+prompt = PromptTemplate.from_template(
+    """Question: {question}
+Think step by step, then finish with a line of the form "Final answer: <number>".
+Answer: Let's think step by step."""
+)
+
+chain = (prompt | llm).with_config(callbacks=[telemetry_handler])
+
+# "Final answer: 1,234.5" followed by something that ends the number
+FINAL_ANSWER_RE = re.compile(r"Final answer:\s*\$?(-?[\d,]*\.?\d+)(?=[^\d,.]|[.,]\s)", re.IGNORECASE)
+NUMBER_RE = re.compile(r"-?\d[\d,]*\.?\d*")
+
+
+def _normalize_number(text: str):
+    """Turn '1,200.0' into '1200' so equal answers compare equal."""
+    value = float(text.replace(",", "").rstrip("."))
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def extract_final_answer(text: str, complete: bool = False):
+    """
+    Return the normalized final numeric answer in text, or None.
+
+    While a sample is still streaming only an explicit, finished
+    "Final answer: N" line counts. Once the sample is complete, the last
+    number in the text is used as a fallback.
+    """
+    match = FINAL_ANSWER_RE.search(text + ("\n" if complete else ""))
+    if match:
+        return _normalize_number(match.group(1))
+    if complete:
+        numbers = NUMBER_RE.findall(text)
+        if numbers:
+            return _normalize_number(numbers[-1])
+    return None
+
+
+async def _sample(chain, inputs, sample: dict):
+    """
+    Stream one sample into the sample dict and return as soon as its final answer is known.
+
+    The dict is updated while streaming, so a sample that gets cancelled still
+    shows how far it got. Output tokens come from the provider's usage when the
+    stream finishes; otherwise they are estimated as one token per chunk.
+    """
+    text = ""
+    stream = chain.astream(inputs)
+    try:
+        async for chunk in stream:
+            text += chunk.content
+            sample["chunks"] += 1
+            if chunk.usage_metadata:
+                sample["output_tokens"] = chunk.usage_metadata["output_tokens"]
+                sample["estimated"] = False
+            elif sample["estimated"]:
+                sample["output_tokens"] = sample["chunks"]
+            answer = extract_final_answer(text)
+            if answer is not None:
+                sample["status"] = "early_exit"
+                sample["answer"] = answer
+                return sample
+        sample["status"] = "complete"
+        sample["answer"] = extract_final_answer(text, complete=True)
+        return sample
+    finally:
+        # Close the stream explicitly so the rest of the sample is dropped right away
+        await stream.aclose()
+
+
+async def self_consistent_answer(question: str, n_samples: int = 5, quorum: int = None, chain=chain):
+    """
+    Answer a question by majority vote over concurrent CoT samples.
+
+    Parameters:
+    - question (str): The question to answer.
+    - n_samples (int): Number of samples to run concurrently.
+    - quorum (int): Agreeing samples needed to stop early (default is a strict majority).
+    - chain: Runnable taking {"question": ...} and producing a message.
+
+    Returns:
+    - dict: answer, whether the quorum was reached, votes, the number of
+      samples completed and cancelled, per-sample status and output tokens
+      (estimated for samples cut short), their total, and the wall time.
+    """
+    quorum = quorum or n_samples // 2 + 1
+    start = time.perf_counter()
+    inputs = {"question": question}
+
+    samples = [
+        {"index": i, "status": "cancelled", "answer": None, "chunks": 0, "output_tokens": 0, "estimated": True}
+        for i in range(n_samples)
+    ]
+    tasks = [asyncio.create_task(_sample(chain, inputs, sample)) for sample in samples]
+    votes = Counter()
+    completed = 0
+    answer = None
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                sample = await next_done
+            except Exception as e:
+                print(f"[self-consistency] Sample failed: {e}")
+                continue
+            completed += 1
+            sample_answer = sample["answer"]
+            if sample_answer is None:
+                continue
+            votes[sample_answer] += 1
+            if votes[sample_answer] >= quorum:
+                answer = sample_answer
+                break
+    finally:
+        cancelled = sum(1 for task in tasks if not task.done())
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for sample, result in zip(samples, results):
+            if isinstance(result, Exception):
+                sample["status"] = "failed"
+
+    consensus = answer is not None
+    if not consensus and votes:
+        # No quorum: fall back to the most common answer
+        answer = votes.most_common(1)[0][0]
+
+    return {
+        "answer": answer,
+        "consensus": consensus,
+        "votes": dict(votes),
+        "completed": completed,
+        "cancelled": cancelled,
+        "samples": samples,
+        "output_tokens": sum(sample["output_tokens"] for sample in samples),
+        "latency": time.perf_counter() - start,
+    }
+
+
+def run_self_consistency(question: str, n_samples: int = 5, quorum: int = None, chain=chain):
+    """Synchronous wrapper around self_consistent_answer()."""
+    return asyncio.run(self_consistent_answer(question, n_samples=n_samples, quorum=quorum, chain=chain))
+
+
+if __name__ == "__main__":
+    question = "If I have 30 apples, use 20 for lunch, and buy 6 more, how many apples do I have?"
+    result = run_self_consistency(question, n_samples=5)
+
+    print(f"Question: {question}")
+    print(f"Answer: {result['answer']} (consensus: {result['consensus']})")
+    print(f"Votes: {result['votes']}")
+    print(f"Samples completed: {result['completed']}, cancelled: {result['cancelled']}")
+    for sample in result["samples"]:
+        estimate = " (estimated)" if sample["estimated"] else ""
+        print(f"  #{sample['index']}: {sample['status']:<10} answer={sample['answer']} "
+              f"output tokens={sample['output_tokens']}{estimate}")
+    print(f"Output tokens: {result['output_tokens']}")
+    print(f"Latency: {result['latency']:.2f}s")
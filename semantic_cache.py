@@ -0,0 +1,154 @@
+"""
+Semantic near-duplicate cache for the research agents' answers.
+
+Incoming queries are embedded locally and compared with the queries answered
+recently. If one is similar enough and still fresh, its stored final answer
+and sources are returned instead of running the full LLM + Tavily loop again.
+Entries expire after a TTL, and the oldest ones are evicted when the cache is
+full. stats() and print_stats() report the hit rate and the latency saved.
+
+The cache is only an optimization: if the embedding model can't be loaded or
+fails, the error is reported once, the cache disables itself and every
+lookup is a miss, so the agents keep working.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+from langchain_core.messages import ToolMessage
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def extract_sources(messages):
+    """URLs of the Tavily results found in a run's tool messages."""
+    sources = []
+    for message in messages:
+        if not isinstance(message, ToolMessage):
+            continue
+        try:
+            results = json.loads(message.content)
+        except (TypeError, json.JSONDecodeError):
+            continue
+        for result in results if isinstance(results, list) else []:
+            url = isinstance(result, dict) and result.get("url")
+            if url and url not in sources:
+                sources.append(url)
+    return sources
+
+
+class SemanticAnswerCache:
+    """
+    Vector index of recent queries and their final answers.
+
+    Parameters:
+    - embeddings: LangChain Embeddings model (default is a local sentence-transformers model).
+    - threshold (float): Minimum cosine similarity for a hit.
+    - ttl (float): Seconds an answer stays fresh.
+    - max_entries (int): Size limit; the oldest entries are evicted first.
+    """
+
+    def __init__(self, embeddings=None, threshold=0.9, ttl=3600, max_entries=1000):
+        self._embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._vectors = None
+        self._entries = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # Set to the embedding error that disabled the cache, if any
+        self.disabled_by = None
+
+    @property
+    def embeddings(self):
+        # Loading the model takes a few seconds, so wait until the first query
+        if self._embeddings is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            self._embeddings = HuggingFaceEmbeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+        return self._embeddings
+
+    def _embed(self, query):
+        """Normalized query vector, or None once the embedding model has failed."""
+        if self.disabled_by is not None:
+            return None
+        try:
+            vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        except Exception as e:
+            # Missing package, failed model download or load: run without the cache
+            self.disabled_by = e
+            print(f"[answer cache] Disabled, embedding failed: {e!r}")
+            return None
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _evict_expired(self, now):
+        keep = [i for i, entry in enumerate(self._entries) if now - entry["created"] < self.ttl]
+        if len(keep) < len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else None
+
+    def lookup(self, query):
+        """
+        Return the cached entry for a near-duplicate query, or None.
+
+        A hit is a dict with the original query, answer, sources and the
+        similarity score.
+        """
+        start = time.perf_counter()
+        vector = self._embed(query)
+        with self._lock:
+            self._evict_expired(time.time())
+            if vector is not None and self._vectors is not None:
+                similarities = self._vectors @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry = self._entries[best]
+                    self.hits += 1
+                    self.saved_seconds += max(entry["latency"] - (time.perf_counter() - start), 0)
+                    return {**entry, "similarity": float(similarities[best])}
+            self.misses += 1
+        return None
+
+    def store(self, query, answer, sources=(), latency=0.0):
+        """Cache the final answer of a query that took `latency` seconds to compute."""
+        vector = self._embed(query)
+        if vector is None:
+            return
+        entry = {"query": query, "answer": answer, "sources": list(sources),
+                 "latency": latency, "created": time.time()}
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vector[np.newaxis, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._entries.append(entry)
+            if len(self._entries) > self.max_entries:
+                overflow = len(self._entries) - self.max_entries
+                self._entries = self._entries[overflow:]
+                self._vectors = self._vectors[overflow:]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "disabled": self.disabled_by is not None,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Answer cache: {stats['hits']} hits / {stats['hits'] + stats['misses']} lookups "
+              f"({stats['hit_rate']:.0%}), {stats['saved_seconds']:.1f}s saved, {stats['entries']} entries"
+              + (" (disabled)" if stats["disabled"] else ""))
+
+
+# Shared by the research REPLs
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,126 @@
+"""
+Batch research mode for the Tavily agents.
+
+Reads queries from a JSONL file, runs them through a compiled research graph
+with a concurrency limit, and appends each answer and its timing to an output
+JSONL file as soon as it finishes. Queries already answered in the output
+file are skipped, so an interrupted run can simply be restarted.
+
+Each input line is a JSON object with a "query" (or "question") field, or a
+"title"/"body" pair as in requests.jsonl. An "id" or "request_id" field is
+used as the key; otherwise the line number is.
+
+    python tavily_batch.py requests.jsonl answers.jsonl --concurrency 4
+    python tavily_batch.py queries.jsonl answers.jsonl --agent simple
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from agent_budget import new_budget, record_budget_usage
+from rate_limit import BATCH, priority
+from telemetry import telemetry_handler
+
+
+def load_agent(name: str):
+    """Import the compiled graph lazily; each example module sets up its own LLM and tools on import."""
+    if name == "graph":
+        from tavily_langgraph_example import app
+        return app
+    if name == "simple":
+        from tavily_simple_example import agent
+        return agent
+    raise ValueError(f"Unknown agent: {name}")
+
+
+def read_queries(path: str):
+    """Return a list of {"id", "query"} dicts from a JSONL file."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            query = record.get("query") or record.get("question")
+            if not query:
+                query = "\n\n".join(part for part in (record.get("title"), record.get("body")) if part)
+            if not query:
+                print(f"Skipping line {line_number}: no query found")
+                continue
+            query_id = str(record.get("id") or record.get("request_id") or line_number)
+            queries.append({"id": query_id, "query": query})
+    return queries
+
+
+def finished_ids(path: str):
+    """IDs that already have an answer in the output file (failed queries are retried)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if "answer" in record:
+                done.add(record["id"])
+    return done
+
+
+async def run_batch(input_path: str, output_path: str, agent_name: str = "graph", concurrency: int = 4):
+    """Answer every unfinished query in input_path and append the results to output_path."""
+    queries = read_queries(input_path)
+    done = finished_ids(output_path)
+    pending = [q for q in queries if q["id"] not in done]
+    print(f"{len(queries)} queries, {len(queries) - len(pending)} already answered, {len(pending)} to run")
+    if not pending:
+        return
+
+    graph = load_agent(agent_name)
+
+    async def research_query(item, config):
+        start = time.perf_counter()
+        record = {"id": item["id"], "query": item["query"]}
+        try:
+            inputs = {"messages": [("user", item["query"])], "budget": new_budget()}
+            state = await graph.ainvoke(inputs, config=config)
+            record["answer"] = state["messages"][-1].content
+            usage = record_budget_usage(f"tavily_batch:{agent_name}", state)
+            record["budget"] = {key: usage[key] for key in ("tokens", "tool_rounds", "stopped_by")}
+        except Exception as e:
+            record["error"] = repr(e)
+        record["elapsed"] = round(time.perf_counter() - start, 3)
+        return record
+
+    runner = RunnableLambda(research_query, name="research_query")
+    batch_start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, priority(BATCH):
+        config = {"max_concurrency": concurrency, "callbacks": [telemetry_handler]}
+        async for _, record in runner.abatch_as_completed(pending, config=config):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            status = "error" if "error" in record else "done"
+            print(f"[{status}] {record['id']} in {record['elapsed']:.1f}s")
+
+    print(f"\nFinished {len(pending)} queries in {time.perf_counter() - batch_start:.1f}s")
+    telemetry_handler.print_summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run research queries from a JSONL file through a Tavily agent.")
+    parser.add_argument("input", nargs="?", default="requests.jsonl", help="JSONL file with queries")
+    parser.add_argument("output", nargs="?", default="research_answers.jsonl", help="JSONL file for answers")
+    parser.add_argument("--agent", choices=["graph", "simple"], default="graph",
+                        help="graph: tavily_langgraph_example, simple: tavily_simple_example")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries run at the same time")
+    args = parser.parse_args()
+
+    asyncio.run(run_batch(args.input, args.output, args.agent, args.concurrency))
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import time
 from typing import TypedDict, Annotated
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_openai import ChatOpenAI
@@ -7,6 +8,12 @@ from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 
+from agent_budget import budget_exhausted, final_answer_messages, new_budget, record_budget_usage
+from client_registry import prewarm, print_latency_report, shared_client_kwargs
+from rate_limit import throttle
+from semantic_cache import answer_cache, extract_sources
+from telemetry import telemetry_handler
+
 load_dotenv()
 
 # Verify API keys
@@ -24,16 +31,18 @@ if not openai_key:
 # Define the state for our graph
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    budget: dict  # per-query limits, see agent_budget.new_budget()
+    stopped_by: str  # budget that forced the final answer, if any
 
 # Initialize the Tavily search tool
 # max_results: number of search results to return
-tavily_tool = TavilySearchResults(max_results=3)
+tavily_tool = throttle(TavilySearchResults(max_results=3, **shared_client_kwargs("tavily")))
 
 # Create a list of tools
 tools = [tavily_tool]
 
 # Initialize the LLM with tools
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_client_kwargs("openai")))
 llm_with_tools = llm.bind_tools(tools)
 
 # Define the agent node - decides whether to use tools or respond
@@ -43,17 +52,32 @@ def agent(state: AgentState):
     response = llm_with_tools.invoke(messages)
     return {"messages": [response]}
 
+# Define the final answer node - used when a budget is about to run out
+def finalize(state: AgentState):
+    """Answer with what has been gathered so far, without tools."""
+    messages = state["messages"]
+    stopped_by = budget_exhausted(state)
+    response = llm.invoke(final_answer_messages(messages))
+    return {"messages": [response], "stopped_by": stopped_by}
+
 # Define whether to continue or end
 def should_continue(state: AgentState):
-    """Determine if we should continue to tools or end."""
+    """Determine if we should continue to tools, answer early or end."""
     messages = state["messages"]
     last_message = messages[-1]
     
     # If there are no tool calls, we're done
     if not last_message.tool_calls:
         return "end"
-    else:
-        return "continue"
+    # Don't start another tool round the budget can't afford
+    if budget_exhausted(state):
+        return "finalize"
+    return "continue"
+
+# Define whether the agent may take another step after the tools ran
+def check_budget(state: AgentState):
+    """Route to the final answer step if the next agent step would overrun the budget."""
+    return "finalize" if budget_exhausted(state) else "agent"
 
 # Create the graph
 workflow = StateGraph(AgentState)
@@ -61,6 +85,7 @@ workflow = StateGraph(AgentState)
 # Add nodes
 workflow.add_node("agent", agent)
 workflow.add_node("tools", ToolNode(tools))
+workflow.add_node("finalize", finalize)
 
 # Set the entry point
 workflow.set_entry_point("agent")
@@ -71,24 +96,47 @@ workflow.add_conditional_edges(
     should_continue,
     {
         "continue": "tools",
+        "finalize": "finalize",
         "end": END
     }
 )
 
-# Add edge from tools back to agent
-workflow.add_edge("tools", "agent")
+# Go from tools back to agent while the budget allows it
+workflow.add_conditional_edges(
+    "tools",
+    check_budget,
+    {
+        "agent": "agent",
+        "finalize": "finalize"
+    }
+)
+workflow.add_edge("finalize", END)
 
 # Compile the graph
-app = workflow.compile()
+app = workflow.compile().with_config(callbacks=[telemetry_handler])
 
 # Run the agent
-def run_research_query(query: str):
-    """Run a research query using the Tavily-powered agent."""
+def run_research_query(query: str, **budget_limits):
+    """Run a research query using the Tavily-powered agent within a per-query budget."""
     print(f"\n{'='*60}")
     print(f"Query: {query}")
     print(f"{'='*60}\n")
     
-    inputs = {"messages": [("user", query)]}
+    # Return a recent answer to the same (or a paraphrased) question
+    cached = answer_cache.lookup(query)
+    if cached:
+        print(f"(cached answer for: {cached['query']!r}, similarity {cached['similarity']:.2f})")
+        print(f"\n{'='*60}")
+        print("FINAL ANSWER:")
+        print(f"{'='*60}")
+        print(cached["answer"])
+        for source in cached["sources"]:
+            print(f"- {source}")
+        print(f"{'='*60}\n")
+        return cached["answer"]
+    
+    start = time.perf_counter()
+    inputs = {"messages": [("user", query)], "budget": new_budget(**budget_limits)}
     
     # Stream the results
     for output in app.stream(inputs):
@@ -103,7 +151,7 @@ def run_research_query(query: str):
         print("\n")
     
     # Get the final response
-    final_state = app.invoke(inputs)
+    final_state = app.invoke({**inputs, "budget": new_budget(**budget_limits)})
     final_message = final_state["messages"][-1]
     
     print(f"\n{'='*60}")
@@ -112,6 +160,18 @@ def run_research_query(query: str):
     print(final_message.content)
     print(f"{'='*60}\n")
     
+    usage = record_budget_usage("tavily_langgraph_example", final_state)
+    print(f"Budget used: {usage['wall_time']:.1f}s, {usage['tokens']} tokens, "
+          f"{usage['tool_rounds']} tool rounds (stopped by: {usage['stopped_by'] or 'answer'})\n")
+    
+    # A budget-forced answer may be incomplete, so don't serve it to later queries
+    if not final_state.get("stopped_by"):
+        answer_cache.store(
+            query,
+            final_message.content,
+            extract_sources(final_state["messages"]),
+            latency=time.perf_counter() - start,
+        )
     return final_message.content
 
 if __name__ == "__main__":
@@ -130,10 +190,16 @@ if __name__ == "__main__":
         print(f"{i}. {q}")
     print("\nType 'quit' to exit\n")
     
+    # Open the OpenAI and Tavily connections while waiting for the first question
+    prewarm()
+    
     while True:
         query = input("\nWhat would you like to research? ")
         
         if query.lower() in ['quit', 'exit', 'q']:
+            telemetry_handler.print_summary()
+            answer_cache.print_stats()
+            print_latency_report()
             print("Goodbye!")
             break
         
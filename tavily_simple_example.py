@@ -5,9 +5,17 @@ This is a minimal implementation to get you started quickly.
 
 from dotenv import load_dotenv
 import os
+import time
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
+
+from agent_budget import budget_exhausted, final_answer_messages, new_budget, record_budget_usage
+from client_registry import prewarm, print_latency_report, shared_client_kwargs
+from rate_limit import throttle
+from semantic_cache import answer_cache, extract_sources
+from telemetry import telemetry_handler
 
 load_dotenv()
 
@@ -21,35 +29,77 @@ if not os.getenv("OPENAI_API_KEY"):
     exit(1)
 
 # Initialize Tavily search tool
-search = TavilySearchResults(
+search = throttle(TavilySearchResults(
     max_results=5,  # Number of search results to return
     search_depth="advanced",  # Options: "basic" or "advanced"
     include_answer=True,  # Include a short answer in the response
     include_raw_content=False,  # Don't include raw HTML
     include_images=False,  # Don't include images
-)
+    **shared_client_kwargs("tavily"),  # Pooled keep-alive HTTP client
+))
 
 # Initialize the LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = throttle(ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_client_kwargs("openai")))
+
+llm_with_tools = llm.bind_tools([search])
+
+# Agent state with a per-query budget, see agent_budget.new_budget()
+class BudgetedAgentState(AgentState):
+    budget: dict
+    stopped_by: str
+
+def enforce_budget(state):
+    """Before each model call, switch to a final answer if the budget is about to run out."""
+    stopped_by = budget_exhausted(state)
+    if not stopped_by:
+        return {"llm_input_messages": state["messages"]}
+    return {"llm_input_messages": final_answer_messages(state["messages"]), "stopped_by": stopped_by}
+
+def select_model(state, runtime):
+    """Drop the tools once the budget has forced a final answer, so the loop ends."""
+    return llm if state.get("stopped_by") else llm_with_tools
 
 # Create the agent with tools
 # This is the simplest way to use LangGraph with tools
 agent = create_react_agent(
-    model=llm,
+    model=select_model,
     tools=[search],
-)
+    pre_model_hook=enforce_budget,
+    state_schema=BudgetedAgentState,
+).with_config(callbacks=[telemetry_handler])
 
-def research(query: str):
-    """Run a research query using Tavily."""
+def research(query: str, **budget_limits):
+    """Run a research query using Tavily within a per-query budget."""
     print(f"\n🔍 Researching: {query}\n")
     
+    # Return a recent answer to the same (or a paraphrased) question
+    cached = answer_cache.lookup(query)
+    if cached:
+        print(f"♻️  Cached answer (similarity {cached['similarity']:.2f} to {cached['query']!r})")
+        print(f"\n📝 Answer:\n{cached['answer']}\n")
+        for source in cached["sources"]:
+            print(f"- {source}")
+        return cached["answer"]
+    
     # Invoke the agent
-    result = agent.invoke({"messages": [("user", query)]})
+    start = time.perf_counter()
+    result = agent.invoke({"messages": [("user", query)], "budget": new_budget(**budget_limits)})
     
     # Get the final answer
     final_message = result["messages"][-1]
+    usage = record_budget_usage("tavily_simple_example", result)
+    # A budget-forced answer may be incomplete, so don't serve it to later queries
+    if not result.get("stopped_by"):
+        answer_cache.store(
+            query,
+            final_message.content,
+            extract_sources(result["messages"]),
+            latency=time.perf_counter() - start,
+        )
     
     print(f"\n📝 Answer:\n{final_message.content}\n")
+    print(f"⏱️  {usage['wall_time']:.1f}s, {usage['tokens']} tokens, {usage['tool_rounds']} tool rounds"
+          f" (stopped by: {usage['stopped_by'] or 'answer'})\n")
     return final_message.content
 
 if __name__ == "__main__":
@@ -70,10 +120,16 @@ if __name__ == "__main__":
     
     print("\nType 'quit' to exit\n")
     
+    # Open the OpenAI and Tavily connections while waiting for the first question
+    prewarm()
+    
     while True:
         query = input("Your question: ").strip()
         
         if query.lower() in ['quit', 'exit', 'q']:
+            telemetry_handler.print_summary()
+            answer_cache.print_stats()
+            print_latency_report()
             print("👋 Goodbye!")
             break
         
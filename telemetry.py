@@ -0,0 +1,352 @@
+"""
+Latency, token and cost telemetry for chains and graphs.
+
+TelemetryHandler is a LangChain callback handler. Attach it to a chain or a
+compiled graph with .with_config(callbacks=[telemetry_handler]) and it records
+one structured event per LLM call, graph node, tool call and top-level run:
+
+- wall time and time to first token (streamed calls only)
+- input, output and cached input tokens
+- estimated cost in USD
+
+Events are appended to a rotating local JSONL file and folded into an
+in-process latency histogram that print_summary() reports. Run this file
+directly to measure the handler's overhead against a fake chat model.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from logging.handlers import RotatingFileHandler
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# USD per 1M tokens: (input, cached input, output)
+PRICING = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "amazon.nova-micro-v1:0": (0.035, 0.00875, 0.14),
+}
+
+TELEMETRY_LOG = os.getenv("TELEMETRY_LOG", "telemetry.jsonl")
+TELEMETRY_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", 10 * 1024 * 1024))
+TELEMETRY_BACKUPS = int(os.getenv("TELEMETRY_BACKUPS", 5))
+
+
+def estimate_cost(model, input_tokens, output_tokens, cached_tokens=0):
+    """Estimate the cost of a call in USD, or None if the model has no price."""
+    prices = PRICING.get(model)
+    if prices is None:
+        # Dated snapshots such as "gpt-4o-mini-2024-07-18" share the base price
+        prices = next((p for name, p in PRICING.items() if model and model.startswith(name + "-")), None)
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (uncached * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+def _error_fields(error):
+    """Event fields for a failed run; a closed stream or cancelled task is a cancellation, not an error."""
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+        return {"cancelled": True}
+    return {"error": repr(error)}
+
+
+class LatencyHistogram:
+    """Fixed, log-spaced latency buckets; cheap enough to update on every event."""
+
+    # 1ms .. ~2 minutes, each bucket 25% wider than the previous one
+    BOUNDS = [0.001 * 1.25 ** i for i in range(53)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def add(self, seconds):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile."""
+        if not self.n:
+            return None
+        target = q / 100 * self.n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.BOUNDS[min(i, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+
+class TelemetryHandler(BaseCallbackHandler):
+    """Callback handler that emits one structured event per LLM call, graph node, tool and run."""
+
+    # The callbacks only update dicts and write a buffered log line. Run them
+    # inline on async paths too, instead of one thread pool hop per callback
+    # (and per streamed token).
+    run_inline = True
+
+    def __init__(self, log_path=TELEMETRY_LOG, max_bytes=TELEMETRY_MAX_BYTES, backups=TELEMETRY_BACKUPS):
+        self.logger = None
+        if log_path:
+            self.logger = logging.getLogger(f"telemetry.{id(self)}")
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+            file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, delay=True)
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(file_handler)
+
+        self._runs = {}
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.totals = {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cost": 0.0}
+
+    # --- Recording -------------------------------------------------------
+
+    def _start(self, run_id, kind, name, parent_run_id, **extra):
+        self._runs[run_id] = {"kind": kind, "name": name, "parent_run_id": parent_run_id,
+                              "start": time.perf_counter(), "first_token": None, "chunks": 0, **extra}
+
+    def _finish(self, run_id, **fields):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        now = time.perf_counter()
+        event = {
+            "ts": time.time(),
+            "type": run["kind"],
+            "name": run["name"],
+            "run_id": str(run_id),
+            "parent_run_id": str(run["parent_run_id"]) if run["parent_run_id"] else None,
+            "wall_time": now - run["start"],
+        }
+        if run["kind"] == "llm":
+            event["model"] = run["model"]
+            event["ttft"] = run["first_token"] - run["start"] if run["first_token"] else None
+        event.update(fields)
+        self.record(event)
+        return event
+
+    def record(self, event):
+        """Write an event to the JSONL log and fold it into the summary."""
+        with self._lock:
+            key = (event["type"], event.get("model") or event["name"])
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.add(event["wall_time"])
+            if event["type"] == "llm":
+                for field in ("input_tokens", "output_tokens", "cached_tokens"):
+                    self.totals[field] += event.get(field) or 0
+                self.totals["cost"] += event.get("cost") or 0.0
+        if self.logger:
+            self.logger.info(json.dumps(event, default=str))
+
+    # --- LLM callbacks ---------------------------------------------------
+
+    def _on_model_start(self, serialized, run_id, parent_run_id, metadata, kwargs, prompt_chars):
+        params = kwargs.get("invocation_params") or {}
+        model = ((metadata or {}).get("ls_model_name") or params.get("model_name")
+                 or params.get("model") or params.get("model_id"))
+        name = kwargs.get("name") or (serialized or {}).get("name") or "llm"
+        self._start(run_id, "llm", name, parent_run_id, model=model, prompt_chars=prompt_chars)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        prompt_chars = sum(len(str(m.content)) for batch in messages for m in batch)
+        self._on_model_start(serialized, run_id, parent_run_id, metadata, kwargs, prompt_chars)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._on_model_start(serialized, run_id, parent_run_id, metadata, kwargs, sum(map(len, prompts)))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is None:
+            return
+        run["chunks"] += 1
+        if run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is None:
+            return
+        input_tokens = output_tokens = cached_tokens = 0
+        usage = None
+        response_metadata = {}
+        try:
+            message = response.generations[0][0].message
+            usage = message.usage_metadata
+            response_metadata = message.response_metadata
+        except (IndexError, AttributeError):
+            pass
+        if usage:
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        else:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = token_usage.get("prompt_tokens", 0)
+            output_tokens = token_usage.get("completion_tokens", 0)
+        if not run["model"]:
+            run["model"] = ((response.llm_output or {}).get("model_name")
+                            or response_metadata.get("model_name") or response_metadata.get("model_id"))
+
+        self._finish(
+            run_id,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            cost=estimate_cost(run["model"], input_tokens, output_tokens, cached_tokens),
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        fields = _error_fields(error)
+        run = self._runs.get(run_id)
+        if run is not None and fields.get("cancelled"):
+            # The provider never reports usage for a stream cut short, so estimate it:
+            # about 4 characters per prompt token and one token per streamed chunk
+            input_tokens, output_tokens = run["prompt_chars"] // 4, run["chunks"]
+            fields.update(
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost=estimate_cost(run["model"], input_tokens, output_tokens),
+                usage_estimated=True,
+            )
+        self._finish(run_id, **fields)
+
+    # --- Chain, graph node and tool callbacks ----------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        node = (metadata or {}).get("langgraph_node")
+        # Only time top-level runs and LangGraph nodes; everything nested
+        # inside a node inherits its metadata and would just add noise.
+        if parent_run_id is None:
+            self._start(run_id, "run", name, parent_run_id)
+        elif node and name == node:
+            self._start(run_id, "node", name, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, **_error_fields(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, "tool", kwargs.get("name") or (serialized or {}).get("name"), parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, **_error_fields(error))
+
+    # --- Reporting -------------------------------------------------------
+
+    def summary(self):
+        """Per (event type, name or model) count and latency percentiles, plus token/cost totals."""
+        with self._lock:
+            rows = {
+                f"{kind}:{name}": {
+                    "count": h.n,
+                    "mean": h.total / h.n,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                    "p99": h.percentile(99),
+                }
+                for (kind, name), h in self.histograms.items()
+            }
+            return {"latency": rows, "totals": dict(self.totals)}
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary["latency"]:
+            return
+        print(f"\n{'='*70}")
+        print("TELEMETRY SUMMARY (latency in seconds, percentiles are bucket upper bounds)")
+        print(f"{'='*70}")
+        print(f"{'Event':<36}{'Count':>7}{'Mean':>9}{'p50':>9}{'p99':>9}")
+        for key, row in sorted(summary["latency"].items()):
+            print(f"{key[:35]:<36}{row['count']:>7}{row['mean']:>9.3f}{row['p50']:>9.3f}{row['p99']:>9.3f}")
+        totals = summary["totals"]
+        print(f"\nTokens: {totals['input_tokens']} in ({totals['cached_tokens']} cached), "
+              f"{totals['output_tokens']} out; estimated cost ${totals['cost']:.6f}")
+
+
+# Shared handler used by the scripts in this repo
+telemetry_handler = TelemetryHandler()
+
+
+def print_summary():
+    telemetry_handler.print_summary()
+
+
+def measure_overhead(iterations=2000, stream_chunks=400, stream_iterations=20):
+    """
+    Compare per-call latency with and without telemetry for a fake prompt | llm chain:
+    a sync invoke() with a one-chunk reply, and an async astream() of stream_chunks
+    chunks (where on_llm_new_token fires for every chunk).
+    """
+    import tempfile
+
+    from langchain_core.language_models import FakeListChatModel, GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.prompts import PromptTemplate
+
+    prompt = PromptTemplate.from_template("Question: {question}")
+    sync_chain = prompt | FakeListChatModel(responses=["16"])
+    # GenericFakeChatModel streams one chunk per word and consumes one message per call
+    reply = AIMessage(content=" ".join(["word"] * stream_chunks))
+    stream_chain = prompt | GenericFakeChatModel(messages=itertools.repeat(reply))
+
+    async def stream_once(runnable):
+        async for _ in runnable.astream({"question": "How many apples?"}):
+            pass
+
+    async def time_stream(runnable):
+        await stream_once(runnable)
+        start = time.perf_counter()
+        for _ in range(stream_iterations):
+            await stream_once(runnable)
+        return (time.perf_counter() - start) / stream_iterations
+
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = TelemetryHandler(log_path=os.path.join(tmp, "overhead.jsonl"))
+
+        timings = {}
+        for label, runnable in (("baseline", sync_chain), ("telemetry", sync_chain.with_config(callbacks=[handler]))):
+            runnable.invoke({"question": "warm up"})
+            start = time.perf_counter()
+            for _ in range(iterations):
+                runnable.invoke({"question": "How many apples?"})
+            timings[f"invoke/{label}"] = (time.perf_counter() - start) / iterations
+
+        for label, runnable in (("baseline", stream_chain), ("telemetry", stream_chain.with_config(callbacks=[handler]))):
+            timings[f"astream/{label}"] = asyncio.run(time_stream(runnable))
+
+        for file_handler in handler.logger.handlers:
+            file_handler.close()
+
+    for mode, calls in (("invoke", "sync invoke, 1 chunk"), ("astream", f"async astream, {stream_chunks} chunks")):
+        baseline, instrumented = timings[f"{mode}/baseline"], timings[f"{mode}/telemetry"]
+        overhead = instrumented - baseline
+        print(f"{calls}:")
+        print(f"  Baseline:  {baseline * 1e6:9.1f} us/call")
+        print(f"  Telemetry: {instrumented * 1e6:9.1f} us/call")
+        print(f"  Overhead:  {overhead * 1e6:9.1f} us/call")
+        # A real gpt-4o-mini call takes hundreds of milliseconds
+        print(f"  That is {overhead / 0.5:.3%} of a typical 500 ms LLM call")
+    return timings
+
+
+if __name__ == "__main__":
+    measure_overhead()
@@ -11,6 +11,10 @@ from langchain.agents import create_agent
 import os
 import sys
 
+from client_registry import shared_client_kwargs
+from rate_limit import throttle
+from telemetry import telemetry_handler
+
 
 load_dotenv()
 openai_key = os.getenv("OPENAI_API_KEY")
@@ -28,11 +32,12 @@ class ResearchResponse(BaseModel):
     tools_used: list[str]
 
 # OpenAI (default)
-openai_llm = ChatOpenAI(
+openai_llm = throttle(ChatOpenAI(
     model="gpt-4o-mini",
     api_key=openai_key,
     # base_url="https://api.openai.com/v1"  # default, no need to specify
-)
+    **shared_client_kwargs("openai"),
+))
 
 parser = PydanticOutputParser(pydantic_object=ResearchResponse)
 
@@ -56,7 +61,7 @@ tools = []
 agent_executor = create_agent(
     model=openai_llm,
     tools=tools
-)
+).with_config(callbacks=[telemetry_handler])
 
 query = input("What can i help you research? ")
 raw_response = agent_executor.invoke({"messages": [("user", query)]})